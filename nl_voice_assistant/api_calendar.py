@@ -1,3 +1,7 @@
+import codecs
+import json
+from datetime import datetime
+
 import requests
 
 CALENDER_ID = "TEAM_NLS_Project"
@@ -24,6 +28,87 @@ def list_events():
     r.raise_for_status()
     return r.json()
 
+# LIST (streaming)
+def iter_events(start=None, end=None, chunk_size=65536):
+    """Yield events while the listing is still downloading.
+
+    The JSON array is decoded incrementally and only events starting in
+    [start, end) are yielded. Stopping the iteration early closes the
+    connection, so the rest of the calendar is never downloaded. A body
+    that is not an array (null, an error object) yields no events.
+    """
+    with requests.get(calendar_url(), timeout=10, stream=True) as r:
+        r.raise_for_status()
+        events = _iter_json_array(r.iter_content(chunk_size))
+        yield from filter_events(events, start, end)
+
+def filter_events(events, start=None, end=None):
+    """Yield events whose start time lies in [start, end)."""
+    if start is None and end is None:
+        yield from events
+        return
+
+    for e in events:
+        dt = event_start(e)
+        if dt is None:
+            continue
+        if start is not None and dt < start:
+            continue
+        if end is not None and dt >= end:
+            continue
+        yield e
+
+def event_start(event):
+    """Parsed start_time as naive local time, or None if missing or malformed."""
+    try:
+        dt = datetime.fromisoformat(event["start_time"])
+    except (KeyError, TypeError, ValueError):
+        return None
+    if dt.tzinfo is not None:
+        # Offsets like "+01:00" would not compare with naive datetimes
+        dt = dt.astimezone().replace(tzinfo=None)
+    return dt
+
+_decoder = json.JSONDecoder()
+_JSON_SKIP = " \t\r\n,"
+
+def _iter_json_array(chunks):
+    """Incrementally decode the elements of a top-level JSON array.
+
+    Anything other than an array (including an empty body) yields nothing.
+    """
+    text = codecs.getincrementaldecoder("utf-8")()
+    buffer = ""
+    started = False
+
+    for chunk in chunks:
+        buffer += text.decode(chunk)
+        pos = 0
+        while True:
+            while pos < len(buffer) and buffer[pos] in _JSON_SKIP:
+                pos += 1
+            if pos == len(buffer):
+                break
+
+            if not started:
+                if buffer[pos] != "[":
+                    return
+                started = True
+                pos += 1
+                continue
+
+            if buffer[pos] == "]":
+                return
+
+            try:
+                item, pos_after = _decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                break  # element not fully received yet
+            yield item
+            pos = pos_after
+
+        buffer = buffer[pos:]
+
 # GET SINGLE
 def get_event(event_id):
     r = requests.get(f"{calendar_url()}&id={event_id}", timeout=10)
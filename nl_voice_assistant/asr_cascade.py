@@ -0,0 +1,178 @@
+"""
+Tiered ASR: decode with the small model first, escalate only when needed.
+
+Every utterance is decoded with the small model with word confidences
+enabled. It is re-decoded with the large model only when the mean word
+confidence is below CONFIDENCE_THRESHOLD or parse_intent cannot make
+sense of the transcript (checked with peek_intent, so the parse cache
+stats only count the main loop's lookups). Stats track the escalation rate and the compute
+saved compared with running the large model on everything. The large
+model's real-time factor for that estimate comes from the escalated
+decodes, LARGE_MODEL_RTF, or a single calibration decode when neither is
+available.
+"""
+
+import json
+import os
+import time
+
+from vosk import Model, KaldiRecognizer
+
+from nlu import peek_intent
+
+LARGE_MODEL_PATH = os.environ.get("LARGE_MODEL_PATH", "vosk-model-en-us-0.22")
+CONFIDENCE_THRESHOLD = float(os.environ.get("CASCADE_CONFIDENCE", "0.8"))
+# Large-model decode seconds per audio second; empty = measure it
+LARGE_MODEL_RTF = float(os.environ["LARGE_MODEL_RTF"]) if os.environ.get("LARGE_MODEL_RTF") else None
+CHUNK_BYTES = 8000  # 4000 frames of 16-bit audio
+
+_large_model = None
+
+stats = {
+    "utterances": 0,
+    "escalated": 0,
+    "audio_seconds": 0.0,
+    "escalated_audio_seconds": 0.0,
+    "small_seconds": 0.0,
+    "large_seconds": 0.0,
+    "calibration_rtf": None,
+}
+
+
+def check_large_model():
+    if not os.path.exists(LARGE_MODEL_PATH):
+        print("ERROR: Large Vosk model for cascade mode not found at", LARGE_MODEL_PATH)
+        return False
+    return True
+
+
+def large_model():
+    global _large_model
+    if _large_model is None:
+        _large_model = Model(LARGE_MODEL_PATH)
+    return _large_model
+
+
+def decode(model, pcm, sample_rate, on_partial=None):
+    """Decode 16-bit mono PCM; return (text, words, decode seconds)."""
+    start = time.perf_counter()
+    recognizer = KaldiRecognizer(model, sample_rate)
+    recognizer.SetWords(True)
+
+    texts = []
+    words = []
+    for i in range(0, len(pcm), CHUNK_BYTES):
+        if recognizer.AcceptWaveform(pcm[i:i + CHUNK_BYTES]):
+            result = json.loads(recognizer.Result())
+            texts.append(result.get("text", ""))
+            words += result.get("result", [])
+        elif on_partial:
+            partial = json.loads(recognizer.PartialResult()).get("partial", "")
+            if partial:
+                on_partial(partial)
+
+    result = json.loads(recognizer.FinalResult())
+    texts.append(result.get("text", ""))
+    words += result.get("result", [])
+
+    text = " ".join(t for t in texts if t).strip()
+    return text, words, time.perf_counter() - start
+
+
+def mean_confidence(words):
+    if not words:
+        return None
+    return sum(w.get("conf", 0.0) for w in words) / len(words)
+
+
+def escalation_reason(text, words):
+    """Why the small-model transcript should be re-decoded, or None."""
+    confidence = mean_confidence(words)
+    if confidence is None or confidence < CONFIDENCE_THRESHOLD:
+        return "low_confidence"
+    if peek_intent(text) == "unknown":
+        return "unknown_intent"
+    return None
+
+
+def calibrate(pcm, sample_rate):
+    """Decode once with the large model to measure its real-time factor.
+
+    Only used when nothing has been escalated and LARGE_MODEL_RTF is unset;
+    the calibration decode is not counted as cascade compute.
+    """
+    audio_seconds = len(pcm) / 2 / sample_rate
+    if audio_seconds <= 0:
+        return
+    _, _, seconds = decode(large_model(), pcm, sample_rate)
+    stats["calibration_rtf"] = seconds / audio_seconds
+
+
+def refine(text, words, small_seconds, pcm, sample_rate):
+    """Take a small-model result and escalate it if needed.
+
+    Returns (text, info) where info describes the decision for logging.
+    """
+    audio_seconds = len(pcm) / 2 / sample_rate
+    stats["utterances"] += 1
+    stats["audio_seconds"] += audio_seconds
+    stats["small_seconds"] += small_seconds
+
+    info = {"confidence": mean_confidence(words), "escalated": False}
+    reason = escalation_reason(text, words)
+    if reason is None:
+        if (LARGE_MODEL_RTF is None and stats["calibration_rtf"] is None
+                and stats["escalated_audio_seconds"] == 0):
+            calibrate(pcm, sample_rate)
+        return text, info
+
+    large_text, large_words, large_seconds = decode(large_model(), pcm, sample_rate)
+    stats["escalated"] += 1
+    stats["escalated_audio_seconds"] += audio_seconds
+    stats["large_seconds"] += large_seconds
+
+    info.update({
+        "escalated": True,
+        "reason": reason,
+        "small_text": text,
+        "large_confidence": mean_confidence(large_words),
+    })
+    return (large_text or text), info
+
+
+def transcribe(pcm, sample_rate, small_model, on_partial=None):
+    """Decode with the small model and escalate if needed."""
+    text, words, small_seconds = decode(small_model, pcm, sample_rate, on_partial)
+    return refine(text, words, small_seconds, pcm, sample_rate)
+
+
+def report():
+    """Escalation rate and compute saved versus always using the large model."""
+    n = stats["utterances"]
+    result = {
+        "utterances": n,
+        "escalated": stats["escalated"],
+        "escalation_rate": round(stats["escalated"] / n, 3) if n else None,
+        "small_seconds": round(stats["small_seconds"], 2),
+        "large_seconds": round(stats["large_seconds"], 2),
+        "compute_saved": None,
+    }
+
+    # Estimate the always-large cost from the large model's real-time factor,
+    # measured on escalations when there were any
+    if stats["escalated_audio_seconds"] > 0:
+        large_rtf = stats["large_seconds"] / stats["escalated_audio_seconds"]
+        result["large_rtf_source"] = "escalations"
+    elif LARGE_MODEL_RTF is not None:
+        large_rtf = LARGE_MODEL_RTF
+        result["large_rtf_source"] = "LARGE_MODEL_RTF"
+    else:
+        large_rtf = stats["calibration_rtf"]
+        result["large_rtf_source"] = "calibration"
+
+    if large_rtf is not None:
+        always_large = large_rtf * stats["audio_seconds"]
+        spent = stats["small_seconds"] + stats["large_seconds"]
+        result["always_large_seconds"] = round(always_large, 2)
+        result["compute_saved"] = round(1 - spent / always_large, 3) if always_large else None
+    return result
@@ -1,20 +1,34 @@
-﻿import json
-import queue
+﻿import argparse
+import json
+import re
 import sys
 import os
 import gc
+import tempfile
+import time
 
 import sounddevice as sd
+import soundfile as sf
 from vosk import Model, KaldiRecognizer
 import pyttsx3
 
+import asr_cascade
+import prefetch
 from assistant import handle_intent
-from nlu import parse_intent
+from capture import AudioCapture
+from conversation import ConversationState
+from nlu import parse_cache_info, parse_intent
+from profiling import add_profile_arguments, profile_stage, profiler_from_args
 
 #  CONFIGURATION
 MODEL_PATH = "vosk-model-small-en-us-0.15"
 SAMPLE_RATE = 16000
 BLOCK_SIZE = 8000
+STREAMING_TTS = True    # speak clause by clause instead of whole responses
+CLAUSE_MIN_WORDS = 3    # shorter clauses are merged into the previous one (the first into the next)
+TTS_SINK = "speaker"    # speaker, file (TTS_OUTPUT_DIR) or null
+TTS_OUTPUT_DIR = "output"
+ASR_CASCADE = False     # re-decode unreliable utterances with asr_cascade.LARGE_MODEL_PATH
 
 print("ASR_TTS program started")
 
@@ -26,28 +40,40 @@ if not os.path.exists(MODEL_PATH):
 # ================= ASR SETUP =================
 model = Model(MODEL_PATH)
 recognizer = KaldiRecognizer(model, SAMPLE_RATE)
-audio_queue = queue.Queue()
-
-def audio_callback(indata, frames, time, status):
-    if status:
-        print(status, file=sys.stderr)
-    audio_queue.put(bytes(indata))
+# Microphone by default; replay sources from sources.py can be swapped in
+audio_source = AudioCapture(SAMPLE_RATE, BLOCK_SIZE)
 
 # ================= AUDIO CONTROL =================
-def stop_audio_devices():
-    try:
-        sd.stop()
-    except Exception:
-        pass
+def mute_microphone():
+    audio_source.mute()  # input stream stays open; blocks are gated during TTS
 
 
 def speak(text):
-    stop_audio_devices()  #  MUST release mic
+    """Speak text and return the time to first audio in milliseconds."""
+    if TTS_SINK == "null":
+        print("Assistant:", text)
+        return 0.0
+
+    if TTS_SINK == "file":
+        first_audio_ms = speak_to_file(text)
+    elif STREAMING_TTS:
+        first_audio_ms = speak_streaming(text)
+    else:
+        first_audio_ms = speak_blocking(text)
+    print(f"  (first audio after {first_audio_ms:.0f} ms)")
+    return first_audio_ms
+
+
+def speak_blocking(text):
+    mute_microphone()
 
     print("Assistant:", text)
+    start = time.perf_counter()
+    first_audio = []
 
     engine = pyttsx3.init()
     engine.setProperty("rate", 170)
+    engine.connect("started-utterance", lambda name: first_audio.append(time.perf_counter()))
 
     engine.say(text)
     engine.runAndWait()
@@ -56,59 +82,209 @@ def speak(text):
     del engine
     gc.collect()  
 
+    return ((first_audio[0] if first_audio else time.perf_counter()) - start) * 1000
+
+
+# ================= STREAMING TTS =================
+def split_clauses(text):
+    """Split a response at sentence and clause punctuation."""
+    clauses = []
+    for part in re.split(r"(?<=[.!?,;:])\s+", text.strip()):
+        short = len(part.split()) < CLAUSE_MIN_WORDS
+        if clauses and (short or len(clauses[-1].split()) < CLAUSE_MIN_WORDS):
+            clauses[-1] += " " + part
+        else:
+            clauses.append(part)
+    return clauses
+
+
+def speak_streaming(text):
+    """Synthesize the next clause while the current one is playing."""
+    mute_microphone()
+
+    print("Assistant:", text)
+    start = time.perf_counter()
+    first_audio_ms = None
+
+    engine = pyttsx3.init()
+    engine.setProperty("rate", 170)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for i, clause in enumerate(split_clauses(text)):
+            clause_path = os.path.join(tmp_dir, f"clause_{i}.wav")
+            engine.save_to_file(clause, clause_path)
+            engine.runAndWait()
+            data, rate = sf.read(clause_path, dtype="int16")
+
+            sd.wait()  # let the previous clause finish
+            sd.play(data, rate)
+            if first_audio_ms is None:
+                first_audio_ms = (time.perf_counter() - start) * 1000
+
+        sd.wait()
+
+    engine.stop()
+    del engine
+    gc.collect()
+
+    return first_audio_ms or 0.0
+
+
+_file_counter = 0
+
+def speak_to_file(text):
+    """Render text into TTS_OUTPUT_DIR instead of playing it."""
+    global _file_counter
+    _file_counter += 1
+
+    print("Assistant:", text)
+    start = time.perf_counter()
+
+    engine = pyttsx3.init()
+    engine.setProperty("rate", 170)
+    engine.save_to_file(text, os.path.join(TTS_OUTPUT_DIR, f"live_{_file_counter:05d}.wav"))
+    engine.runAndWait()
+    engine.stop()
+
+    return (time.perf_counter() - start) * 1000
+
 # ================= LISTEN ONCE =================
-def listen_once():
+def listen_once(on_partial=None):
+    """Recognize one utterance from audio_source.
+
+    Returns the transcript, or "" if a replay source ran out of audio
+    without producing any text. With ASR_CASCADE, unreliable transcripts
+    are re-decoded with the large model.
+    """
+    cascade = ASR_CASCADE
     recognizer.Reset()
+    recognizer.SetWords(cascade)
+    utterance = bytearray() if cascade else None
+    decode_seconds = 0.0
 
-    while not audio_queue.empty():
-        audio_queue.get()
+    audio_source.start()
+    audio_source.unmute()
 
     print("Listening... Speak now.")
 
-    stream = sd.RawInputStream(
-        samplerate=SAMPLE_RATE,
-        blocksize=BLOCK_SIZE,
-        dtype="int16",
-        channels=1,
-        callback=audio_callback
-    )
+    while True:
+        data = audio_source.read()
+        if data is None:
+            # Replay source finished this utterance
+            audio_source.mute()
+            result = json.loads(recognizer.FinalResult())
+            return _finish_utterance(result, utterance, decode_seconds)
+
+        if utterance is not None:
+            utterance += data
+        decode_start = time.perf_counter()
+        is_final = recognizer.AcceptWaveform(data)
+        decode_seconds += time.perf_counter() - decode_start
+
+        if is_final:
+            result = json.loads(recognizer.Result())
+            text = result.get("text", "").strip()
+            if text:
+                audio_source.mute()
+                return _finish_utterance(result, utterance, decode_seconds)
+        elif on_partial:
+            partial = json.loads(recognizer.PartialResult()).get("partial", "")
+            if partial:
+                on_partial(partial)
 
-    with stream:
-        while True:
-            data = audio_queue.get()
-            if recognizer.AcceptWaveform(data):
-                result = json.loads(recognizer.Result())
-                text = result.get("text", "").strip()
-                if text:
-                    stream.stop()
-                    return text
+def _finish_utterance(result, utterance, decode_seconds):
+    text = result.get("text", "").strip()
+    if utterance is None:
+        return text
+
+    text, info = asr_cascade.refine(
+        text, result.get("result", []), decode_seconds, bytes(utterance), SAMPLE_RATE
+    )
+    print("ASR:", info)
+    return text
 
 # ================= MAIN LOOP =================
-if __name__ == "__main__":
-    conversation_state = {
-        "last_place": None,
-        "last_day": None,
-        "last_created_event_id": None,
-        "last_referenced_event_id": None
-    }
+def run_conversation(max_turns=None, handler=handle_intent, on_turn=None, profiler=None,
+                     prefetch_enabled=True):
+    """Run the listen/understand/speak loop.
 
+    Stops after max_turns (if given) or when the user says exit/quit/stop.
+    on_turn(stats) is called after every turn with the transcript, the
+    time from end of speech to the end of the reply (latency_ms) and the
+    whole turn including recognition (turn_ms). With a profiler, each
+    stage is timed and a memory record is taken per turn. With
+    prefetch_enabled=False partial transcripts start no API requests.
+    """
+    conversation_state = ConversationState()
+    on_partial = None
+    if prefetch_enabled:
+        on_partial = lambda partial: prefetch.on_partial(partial, conversation_state)
+
+    audio_source.start()
     speak("Hello. I am your voice assistant.")
 
     try:
-        while True:
-            user_text = listen_once()
+        turn = 0
+        while max_turns is None or turn < max_turns:
+            turn += 1
+            prefetch.begin_turn()
+            listen_start = time.perf_counter()
+            with profile_stage(profiler, "listen"):
+                user_text = listen_once(on_partial=on_partial)
+            turn_start = time.perf_counter()
             print("User:", user_text)
+            print("Capture:", audio_source.stats())
 
             if user_text.lower() in ("exit", "quit", "stop"):
                 speak("Goodbye!")
                 break
 
-            intent_data = parse_intent(user_text, conversation_state)
+            with profile_stage(profiler, "nlu"):
+                intent_data = parse_intent(user_text, conversation_state)
             print("Intent:", intent_data)
 
-            response_text = handle_intent(intent_data, conversation_state)
-            speak(response_text)
+            with profile_stage(profiler, "handle"):
+                response_text = handler(intent_data, conversation_state)
+            print("Prefetch:", prefetch.end_turn())
+            with profile_stage(profiler, "speak"):
+                first_audio_ms = speak(response_text)
+
+            if profiler:
+                print("Profile:", profiler.end_turn())
+
+            if on_turn:
+                on_turn({
+                    "turn": turn,
+                    "transcript": user_text,
+                    "intent": intent_data.get("intent"),
+                    "latency_ms": (time.perf_counter() - turn_start) * 1000,
+                    "turn_ms": (time.perf_counter() - listen_start) * 1000,
+                    "first_audio_ms": first_audio_ms,
+                })
 
+    finally:
+        audio_source.close()
+        if ASR_CASCADE:
+            print("ASR cascade:", asr_cascade.report())
+        print("Parse cache:", parse_cache_info())
+        if profiler:
+            profiler.dump()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Live voice assistant")
+    parser.add_argument("--cascade", action="store_true",
+                        help="re-decode low-confidence/unknown utterances with the large model")
+    add_profile_arguments(parser, os.path.join("output", "profile_live.txt"))
+    args = parser.parse_args()
+
+    if args.cascade:
+        if not asr_cascade.check_large_model():
+            sys.exit(1)
+        ASR_CASCADE = True
+
+    try:
+        run_conversation(profiler=profiler_from_args(args))
     except KeyboardInterrupt:
         speak("Goodbye!")
         sys.exit(0)
\ No newline at end of file
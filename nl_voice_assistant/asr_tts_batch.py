@@ -3,23 +3,43 @@ Modified ASR_TTS for Docker - Batch Processing with Audio Files
 Processes pre-recorded audio files instead of live microphone
 """
 
+import argparse
 import json
+import multiprocessing
 import sys
 import os
+import time
 import wave
 import numpy as np
+from concurrent.futures import ThreadPoolExecutor
 
 from vosk import Model, KaldiRecognizer
 import pyttsx3
+import soundfile as sf
 
+import asr_cascade
+import prefetch
 from assistant import handle_intent
-from nlu import parse_intent
+from conversation import ConversationState
+from nlu import parse_cache_info, parse_intent
+from profiling import add_profile_arguments, profile_stage, profiler_from_args
 
 # CONFIGURATION
 MODEL_PATH = "vosk-model-small-en-us-0.15"
 SAMPLE_RATE = 16000
 AUDIO_SAMPLES_DIR = "audio_samples"
 OUTPUT_DIR = "output"
+OUTPUT_CODEC = os.environ.get("OUTPUT_CODEC", "wav").lower()
+ENCODE_WORKERS = 2
+ASR_WORKERS = int(os.environ.get("ASR_WORKERS", "0"))  # >0: forked recognizer workers
+ASR_CASCADE = os.environ.get("ASR_CASCADE", "0") == "1"  # escalate to LARGE_MODEL_PATH
+
+# codec -> (file extension, soundfile format, soundfile subtype)
+CODECS = {
+    "wav": (".wav", None, None),
+    "flac": (".flac", "FLAC", "PCM_16"),
+    "ogg": (".ogg", "OGG", "VORBIS"),
+}
 
 print("=" * 60)
 print("Voice Assistant - Docker Batch Processing Mode")
@@ -30,6 +50,13 @@ if not os.path.exists(MODEL_PATH):
     print("ERROR: Vosk model not found at", MODEL_PATH)
     sys.exit(1)
 
+if ASR_CASCADE and not asr_cascade.check_large_model():
+    sys.exit(1)
+
+if OUTPUT_CODEC not in CODECS:
+    print(f"ERROR: Unknown OUTPUT_CODEC '{OUTPUT_CODEC}' (choose from {', '.join(CODECS)})")
+    sys.exit(1)
+
 # Create output directory
 os.makedirs(OUTPUT_DIR, exist_ok=True)
 
@@ -37,9 +64,34 @@ os.makedirs(OUTPUT_DIR, exist_ok=True)
 model = Model(MODEL_PATH)
 recognizer = KaldiRecognizer(model, SAMPLE_RATE)
 
+# ================= AUDIO ENCODING =================
+encoder = ThreadPoolExecutor(max_workers=ENCODE_WORKERS)
+
+def encode_audio(wav_path):
+    """Re-encode a WAV file with OUTPUT_CODEC and return (path, size, encode time)"""
+    extension, fmt, subtype = CODECS[OUTPUT_CODEC]
+    start = time.perf_counter()
+
+    if fmt is None:
+        output_path = wav_path
+    else:
+        output_path = os.path.splitext(wav_path)[0] + extension
+        with sf.SoundFile(wav_path) as src:
+            with sf.SoundFile(output_path, "w", samplerate=src.samplerate,
+                              channels=src.channels, format=fmt, subtype=subtype) as dst:
+                for block in src.blocks(blocksize=65536, dtype="float32"):
+                    dst.write(block)
+        os.remove(wav_path)
+
+    encode_ms = (time.perf_counter() - start) * 1000
+    return output_path, os.path.getsize(output_path), encode_ms
+
 # ================= TTS TO FILE =================
 def speak_to_file(text, output_path):
-    """Generate TTS and save to file instead of playing"""
+    """Generate TTS, save it to file and queue it for encoding.
+
+    Returns a future resolving to the result of encode_audio.
+    """
     print(f"Assistant: {text}")
 
     engine = pyttsx3.init()
@@ -51,9 +103,10 @@ def speak_to_file(text, output_path):
     engine.stop()
 
     print(f"  → Saved audio response to: {output_path}")
+    return encoder.submit(encode_audio, output_path)
 
 # ================= PROCESS AUDIO FILE =================
-def process_audio_file(audio_path):
+def process_audio_file(audio_path, on_partial=None):
     """Process a single WAV audio file and return transcription"""
     print(f"\n📁 Processing: {audio_path}")
 
@@ -80,6 +133,10 @@ def process_audio_file(audio_path):
                     text = result.get("text", "").strip()
                     if text:
                         return text
+                elif on_partial:
+                    partial = json.loads(recognizer.PartialResult()).get("partial", "")
+                    if partial:
+                        on_partial(partial)
 
             # Get final result
             final_result = json.loads(recognizer.FinalResult())
@@ -90,8 +147,99 @@ def process_audio_file(audio_path):
         print(f"  ❌ Error processing audio: {e}")
         return None
 
+# ================= CASCADE ASR =================
+def read_audio_file(audio_path):
+    """Return the PCM frames of a 16 kHz mono WAV file, or None"""
+    try:
+        with wave.open(audio_path, "rb") as wf:
+            if wf.getnchannels() != 1:
+                print("  ⚠️  Warning: Audio must be mono. Skipping.")
+                return None
+            if wf.getframerate() != SAMPLE_RATE:
+                print(f"  ⚠️  Warning: Sample rate must be {SAMPLE_RATE}Hz. Skipping.")
+                return None
+            return wf.readframes(wf.getnframes())
+    except Exception as e:
+        print(f"  ❌ Error processing audio: {e}")
+        return None
+
+def cascade_first_pass(audio_path, on_partial=None):
+    """Small-model pass with word confidences: (text, words, seconds) or None"""
+    print(f"\n📁 Processing: {audio_path}")
+    pcm = read_audio_file(audio_path)
+    if pcm is None:
+        return None
+    return asr_cascade.decode(model, pcm, SAMPLE_RATE, on_partial)
+
+def cascade_finish(audio_path, first_pass):
+    """Escalate the first pass to the large model if needed: (text, info)"""
+    text, words, seconds = first_pass
+    pcm = read_audio_file(audio_path)
+    text, info = asr_cascade.refine(text, words, seconds, pcm, SAMPLE_RATE)
+    if info["escalated"]:
+        print(f"  🔁 Escalated to large model ({info['reason']}): '{info['small_text']}' → '{text}'")
+    return text, info
+
+# ================= FORK-SERVER ASR WORKERS =================
+# The model is loaded once above; forked workers share its pages
+# copy-on-write and only allocate their own recognizer.
+asr_pool = None
+
+def read_memory_usage():
+    """Return RSS, PSS and the shared/private split (KB) for this process"""
+    fields = {}
+    try:
+        with open("/proc/self/smaps_rollup") as f:
+            for line in f:
+                key, _, value = line.partition(":")
+                if value.strip().endswith("kB"):
+                    fields[key] = int(value.split()[0])
+    except OSError:
+        return None
+
+    return {
+        "rss_kb": fields.get("Rss", 0),
+        "pss_kb": fields.get("Pss", 0),
+        "shared_kb": fields.get("Shared_Clean", 0) + fields.get("Shared_Dirty", 0),
+        "private_kb": fields.get("Private_Clean", 0) + fields.get("Private_Dirty", 0),
+    }
+
+def _init_asr_worker():
+    global recognizer
+    recognizer = KaldiRecognizer(model, SAMPLE_RATE)
+
+def _transcribe_in_worker(audio_path):
+    if ASR_CASCADE:
+        first_pass = cascade_first_pass(audio_path)
+    else:
+        first_pass = process_audio_file(audio_path)
+    return first_pass, os.getpid(), read_memory_usage()
+
+def start_asr_workers():
+    """Fork ASR_WORKERS recognizer processes before any other threads start"""
+    global asr_pool
+    if ASR_WORKERS > 0:
+        context = multiprocessing.get_context("fork")
+        asr_pool = context.Pool(ASR_WORKERS, initializer=_init_asr_worker)
+        print(f"🔀 Started {ASR_WORKERS} forked ASR worker(s)")
+
+def stop_asr_workers():
+    if asr_pool is not None:
+        asr_pool.close()
+        asr_pool.join()
+
+def print_worker_memory(worker_memory):
+    print("\nASR worker memory (KB):")
+    print(f"  {'process':<14}{'RSS':>10}{'PSS':>10}{'shared':>10}{'private':>10}")
+    rows = [("parent", read_memory_usage())]
+    rows += [(f"worker {pid}", usage) for pid, usage in sorted(worker_memory.items())]
+    for label, usage in rows:
+        if usage:
+            print(f"  {label:<14}{usage['rss_kb']:>10}{usage['pss_kb']:>10}"
+                  f"{usage['shared_kb']:>10}{usage['private_kb']:>10}")
+
 # ================= BATCH PROCESSING =================
-def process_all_audio_files():
+def process_all_audio_files(profiler=None):
     """Process all audio files in the audio_samples directory"""
 
     if not os.path.exists(AUDIO_SAMPLES_DIR):
@@ -109,15 +257,17 @@ def process_all_audio_files():
     print(f"\n✅ Found {len(audio_files)} audio file(s) to process\n")
 
     # Initialize conversation state
-    conversation_state = {
-        "last_place": None,
-        "last_day": None,
-        "last_created_event_id": None,
-        "last_referenced_event_id": None
-    }
+    conversation_state = ConversationState()
 
     # Process results log
     results_log = []
+    pending_encodes = []
+    worker_memory = {}
+
+    # Workers decode ahead in parallel; intents are still handled in order
+    if asr_pool is not None:
+        audio_paths = [os.path.join(AUDIO_SAMPLES_DIR, f) for f in sorted(audio_files)]
+        transcripts = asr_pool.imap(_transcribe_in_worker, audio_paths)
 
     # Process each audio file
     for idx, audio_file in enumerate(sorted(audio_files), 1):
@@ -127,8 +277,21 @@ def process_all_audio_files():
 
         audio_path = os.path.join(AUDIO_SAMPLES_DIR, audio_file)
 
-        # Transcribe audio
-        user_text = process_audio_file(audio_path)
+        # Transcribe audio, prefetching API data from partial results
+        prefetch.begin_turn()
+        on_partial = lambda partial: prefetch.on_partial(partial, conversation_state)
+        with profile_stage(profiler, "asr"):
+            if asr_pool is not None:
+                first_pass, pid, worker_memory[pid] = next(transcripts)
+            elif ASR_CASCADE:
+                first_pass = cascade_first_pass(audio_path, on_partial)
+            else:
+                first_pass = process_audio_file(audio_path, on_partial)
+
+            if ASR_CASCADE and first_pass is not None:
+                user_text, asr_info = cascade_finish(audio_path, first_pass)
+            else:
+                user_text, asr_info = first_pass, None
 
         if not user_text:
             print("  ❌ Could not transcribe audio")
@@ -138,33 +301,66 @@ def process_all_audio_files():
                 "intent": None,
                 "response": "Failed to transcribe"
             })
+            if profiler:
+                profiler.end_turn()
             continue
 
         print(f"👤 User: {user_text}")
 
         # Parse intent
-        intent_data = parse_intent(user_text, conversation_state)
+        with profile_stage(profiler, "nlu"):
+            intent_data = parse_intent(user_text, conversation_state)
         print(f"🧠 Intent: {intent_data}")
 
         # Generate response
-        response_text = handle_intent(intent_data, conversation_state)
+        with profile_stage(profiler, "handle"):
+            response_text = handle_intent(intent_data, conversation_state)
+        prefetch_stats = prefetch.end_turn()
+        print(f"⚡ Prefetch: {prefetch_stats}")
 
         # Save TTS response
         output_filename = f"response_{idx:02d}_{os.path.splitext(audio_file)[0]}.wav"
         output_path = os.path.join(OUTPUT_DIR, output_filename)
-        speak_to_file(response_text, output_path)
+        with profile_stage(profiler, "tts"):
+            encoded = speak_to_file(response_text, output_path)
 
         # Log result
-        results_log.append({
+        entry = {
             "file": audio_file,
             "transcription": user_text,
             "intent": intent_data,
             "response": response_text,
-            "output_audio": output_filename
-        })
+            "output_audio": output_filename,
+            "prefetch": prefetch_stats
+        }
+        if asr_info:
+            entry["asr"] = asr_info
+        results_log.append(entry)
+        pending_encodes.append((entry, encoded))
+
+        if profiler:
+            print(f"📊 Profile: {profiler.end_turn()}")
 
         print("✅ Completed\n")
 
+    if worker_memory:
+        print_worker_memory(worker_memory)
+
+    if ASR_CASCADE:
+        print(f"\n🔁 ASR cascade: {asr_cascade.report()}")
+    print(f"🧠 Parse cache: {parse_cache_info()}")
+
+    # Wait for background encoding and record output size/time
+    for entry, encoded in pending_encodes:
+        try:
+            path, size, encode_ms = encoded.result()
+        except Exception as e:
+            print(f"  ❌ Could not encode {entry['output_audio']}: {e}")
+            continue
+        entry["output_audio"] = os.path.basename(path)
+        entry["output_bytes"] = size
+        entry["encode_ms"] = round(encode_ms, 1)
+
     # Save results summary
     summary_path = os.path.join(OUTPUT_DIR, "results_summary.json")
     with open(summary_path, "w") as f:
@@ -176,22 +372,34 @@ def process_all_audio_files():
     print(f"\nProcessed {len(audio_files)} audio files")
     print(f"Output directory: {OUTPUT_DIR}/")
     print("\nGenerated files:")
-    print(f"  - {len(audio_files)} audio responses (.wav)")
+    print(f"  - {len(audio_files)} audio responses ({CODECS[OUTPUT_CODEC][0]})")
     print(f"  - 1 results summary (results_summary.json)")
 
 # ================= MAIN =================
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Voice assistant batch processing")
+    add_profile_arguments(parser, os.path.join(OUTPUT_DIR, "profile_batch.txt"))
+    args = parser.parse_args()
+    profiler = None
+
     try:
+        # Fork the workers before the profiler starts tracemalloc, so they
+        # do not inherit allocation tracing
+        start_asr_workers()
+        profiler = profiler_from_args(args)
+
         # Initial greeting
         greeting_path = os.path.join(OUTPUT_DIR, "greeting.wav")
         speak_to_file("Hello. I am your voice assistant. Processing audio samples.", greeting_path)
 
         # Process all audio files
-        process_all_audio_files()
+        process_all_audio_files(profiler)
 
         # Farewell
         farewell_path = os.path.join(OUTPUT_DIR, "farewell.wav")
         speak_to_file("Processing complete. Goodbye!", farewell_path)
+        encoder.shutdown(wait=True)
+        stop_asr_workers()
 
     except KeyboardInterrupt:
         print("\n\n⚠️  Interrupted by user")
@@ -200,4 +408,7 @@ if __name__ == "__main__":
         print(f"\n\n❌ Error: {e}")
         import traceback
         traceback.print_exc()
-        sys.exit(1)
\ No newline at end of file
+        sys.exit(1)
+    finally:
+        if profiler:
+            profiler.dump()
\ No newline at end of file
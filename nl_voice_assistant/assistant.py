@@ -1,6 +1,7 @@
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, date, timedelta
-from api_weather import get_weather
-from api_calendar import create_event, list_events, delete_event, update_event
+from api_calendar import create_event, delete_event, update_event, event_start
+from prefetch import get_weather, iter_events
 
 
 # ---------------- STATE HELPERS ----------------
@@ -27,6 +28,9 @@ def handle_intent(intent, state):
     if name == "check_rain":
         return handle_check_rain(intent, state)
 
+    if name == "compare_weather":
+        return handle_compare_weather(intent, state)
+
     if name == "create_event":
         return handle_create_event(intent, state)
 
@@ -105,6 +109,66 @@ def handle_check_rain(intent, state):
     return f"I could not find a forecast for {place} on {day.strftime('%A')}."
 
 
+def handle_compare_weather(intent, state):
+    places = [p for p in intent.get("places", []) if p]
+    days = [d for d in intent.get("days", []) if d] or [date.today()]
+
+    if not places:
+        return "I am not sure which place you mean."
+
+    state["last_place"] = places[0]
+    state["last_day"] = days[0]
+
+    # One forecast request per place, all in flight at once
+    with ThreadPoolExecutor(max_workers=len(places)) as pool:
+        forecasts = list(pool.map(_fetch_forecast, places))
+
+    parts = []
+    for place, data in zip(places, forecasts):
+        if not data or "forecast" not in data:
+            parts.append(f"I could not get the forecast for {place}.")
+            continue
+
+        by_day = {entry.get("day", "").lower(): entry for entry in data["forecast"]}
+        entries = [(d.strftime("%A"), by_day.get(d.strftime("%A").lower())) for d in days]
+
+        if intent.get("rain_only"):
+            rainy = [
+                name for name, entry in entries
+                if entry and any(w in entry.get("weather", "").lower() for w in ["rain", "shower"])
+            ]
+            dry = [name for name, entry in entries if entry and name not in rainy]
+            missing = [name for name, entry in entries if not entry]
+            if rainy:
+                parts.append(f"In {place} it will rain on {' and '.join(rainy)}.")
+            elif dry:
+                parts.append(f"In {place} it will not rain on {' or '.join(dry)}.")
+            if missing:
+                parts.append(f"I could not find a forecast for {place} on {' or '.join(missing)}.")
+            continue
+
+        descriptions = []
+        for name, entry in entries:
+            if not entry:
+                descriptions.append(f"no forecast for {name}")
+                continue
+            temp = entry.get("temperature", {})
+            descriptions.append(
+                f"{name} {entry.get('weather', 'unknown')}, "
+                f"{temp.get('min', '?')} to {temp.get('max', '?')} degrees"
+            )
+        parts.append(f"In {place}: {'; '.join(descriptions)}.")
+
+    return " ".join(parts)
+
+
+def _fetch_forecast(place):
+    try:
+        return get_weather(place)
+    except Exception:
+        return None
+
+
 # ---------------- CALENDAR ----------------
 
 def handle_create_event(intent, state):
@@ -155,26 +219,24 @@ def handle_delete_this_event(state):
 
 
 def handle_get_next_event(state):
-    events = list_events()
-    if not events:
-        return "You have no appointments."
-
     now = datetime.now()
-    future = []
-
-    for e in events:
-        try:
-            dt = datetime.fromisoformat(e["start_time"])
-            if dt >= now:
-                future.append((dt, e))
-        except Exception:
-            continue
+    has_events = False
+    next_event = None
+
+    # Single pass min selection over the streamed listing
+    for e in iter_events():
+        has_events = True
+        dt = event_start(e)
+        if dt is not None and dt >= now and (next_event is None or dt < next_event[0]):
+            next_event = (dt, e)
 
-    if not future:
+    if not has_events:
+        return "You have no appointments."
+
+    if not next_event:
         return "You have no upcoming appointments."
 
-    future.sort(key=lambda x: x[0])
-    dt, event = future[0]
+    dt, event = next_event
     set_reference(state, event["id"])
 
     return (
@@ -191,19 +253,15 @@ def handle_update_event_location_for_day(intent, state):
     if not event_date or not new_location:
         return "I did not understand the day or the new location."
 
-    events = list_events()
-    for e in events:
-        try:
-            dt = datetime.fromisoformat(e["start_time"])
-            if dt.date() == event_date:
-                update_event(e["id"], location=new_location)
-                set_reference(state, e["id"])
-                return (
-                    f"I have changed the location of your appointment on "
-                    f"{event_date.strftime('%A, %d %B %Y')} to {new_location}."
-                )
-        except Exception:
-            continue
+    # Only events on that day are yielded; the download stops at the first one
+    day_start = datetime.combine(event_date, datetime.min.time())
+    for e in iter_events(start=day_start, end=day_start + timedelta(days=1)):
+        update_event(e["id"], location=new_location)
+        set_reference(state, e["id"])
+        return (
+            f"I have changed the location of your appointment on "
+            f"{event_date.strftime('%A, %d %B %Y')} to {new_location}."
+        )
 
     return f"I could not find an appointment on {event_date.strftime('%A, %d %B %Y')}."
 
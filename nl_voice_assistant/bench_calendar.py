@@ -0,0 +1,147 @@
+"""
+Benchmark for calendar listing on a large synthetic calendar.
+
+Serves a synthetic calendar from a local HTTP stub and compares the old
+full download + sort approach with the streaming listing for next-event
+and event-on-a-day queries.
+
+Usage: python3 bench_calendar.py [num_events]
+"""
+
+import json
+import random
+import sys
+import threading
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import api_calendar
+
+NUM_EVENTS = 50_000
+REPEATS = 5
+
+
+def make_calendar(n, seed=0):
+    rng = random.Random(seed)
+    base = datetime.now() - timedelta(days=365)
+    events = []
+    for i in range(n):
+        start = base + timedelta(minutes=rng.randrange(2 * 365 * 24 * 60))
+        events.append({
+            "id": i,
+            "title": f"Event {i}",
+            "description": "Synthetic benchmark event",
+            "start_time": start.isoformat(timespec="minutes"),
+            "end_time": (start + timedelta(hours=1)).isoformat(timespec="minutes"),
+            "location": rng.choice(["Office", "Room 12", "Berlin", "Marburg"]),
+        })
+    return events
+
+
+def start_stub_server(payload):
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            try:
+                # Send in slices so an early client disconnect stops the transfer
+                for i in range(0, len(payload), 65536):
+                    self.wfile.write(payload[i:i + 65536])
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+# ---------- old approach: full download, list, sort ----------
+def next_event_full():
+    now = datetime.now()
+    future = []
+    for e in api_calendar.list_events():
+        try:
+            dt = datetime.fromisoformat(e["start_time"])
+            if dt >= now:
+                future.append((dt, e))
+        except Exception:
+            continue
+    future.sort(key=lambda x: x[0])
+    return future[0][1] if future else None
+
+
+def event_on_day_full(day):
+    for e in api_calendar.list_events():
+        if datetime.fromisoformat(e["start_time"]).date() == day:
+            return e
+    return None
+
+
+# ---------- streaming approach ----------
+def next_event_streaming():
+    now = datetime.now()
+    best = None
+    for e in api_calendar.iter_events():
+        dt = api_calendar.event_start(e)
+        if dt is not None and dt >= now and (best is None or dt < best[0]):
+            best = (dt, e)
+    return best[1] if best else None
+
+
+def event_on_day_streaming(day):
+    start = datetime.combine(day, datetime.min.time())
+    for e in api_calendar.iter_events(start, start + timedelta(days=1)):
+        return e
+    return None
+
+
+def measure(label, fn, *args):
+    times = []
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        result = fn(*args)
+        times.append(time.perf_counter() - start)
+
+    # Separate run for memory; tracemalloc would distort the timings
+    tracemalloc.start()
+    fn(*args)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    best_ms = min(times) * 1000
+    print(f"  {label:<12} {best_ms:9.1f} ms   peak {peak / 1024 / 1024:7.2f} MiB")
+    return result
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else NUM_EVENTS
+    events = make_calendar(n)
+    payload = json.dumps(events).encode("utf-8")
+    server = start_stub_server(payload)
+    api_calendar.BASE_URL = f"http://127.0.0.1:{server.server_port}/calendar.php"
+    print(f"Calendar: {n} events, {len(payload) / 1024 / 1024:.1f} MiB JSON\n")
+
+    print("Next appointment:")
+    old = measure("full + sort", next_event_full)
+    new = measure("streaming", next_event_streaming)
+    assert old["start_time"] == new["start_time"]
+
+    # Day of an event near the start of the listing, to show early termination
+    day = datetime.fromisoformat(events[n // 100]["start_time"]).date()
+    print(f"\nAppointment on {day}:")
+    old = measure("full scan", event_on_day_full, day)
+    new = measure("streaming", event_on_day_streaming, day)
+    assert old["id"] == new["id"]
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
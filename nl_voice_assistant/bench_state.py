@@ -0,0 +1,87 @@
+"""
+Memory benchmark for conversation state at large session counts.
+
+Compares the old free-form dict, ConversationState and its serialized
+form, reporting bytes per session as measured by tracemalloc.
+
+Usage: python3 bench_state.py [num_sessions]
+"""
+
+import sys
+import time
+import tracemalloc
+from datetime import date, timedelta
+
+from conversation import ConversationState
+
+NUM_SESSIONS = 100_000
+PLACES = ["marburg", "frankfurt", "berlin", "hamburg", "munich", None]
+
+
+def session_values(i, fresh_strings=False):
+    place = PLACES[i % len(PLACES)]
+    if place and fresh_strings:
+        # Simulate place names decoded from fresh transcripts
+        place = "".join(place)
+    day = date(2026, 1, 1) + timedelta(days=i % 60)
+    created_id = 100000 + i if i % 3 else None
+    return place, day, created_id, created_id
+
+
+def make_dict(i, fresh_strings=False):
+    place, day, created_id, referenced_id = session_values(i, fresh_strings)
+    return {
+        "last_place": place,
+        "last_day": day,
+        "last_created_event_id": created_id,
+        "last_referenced_event_id": referenced_id
+    }
+
+
+def make_state(i, fresh_strings=False):
+    state = ConversationState()
+    place, day, created_id, referenced_id = session_values(i, fresh_strings)
+    state["last_place"] = place
+    state["last_day"] = day
+    state["last_created_event_id"] = created_id
+    state["last_referenced_event_id"] = referenced_id
+    return state
+
+
+def make_snapshot(i):
+    return make_state(i).to_bytes()
+
+
+def measure(label, factory, n):
+    tracemalloc.start()
+    start = time.perf_counter()
+    sessions = [factory(i) for i in range(n)]
+    elapsed = time.perf_counter() - start
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print(f"{label:<22} {current / n:8.1f} B/session   "
+          f"{current / 1024 / 1024:8.2f} MiB total   {elapsed:6.2f} s")
+    return sessions
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else NUM_SESSIONS
+    print(f"Sessions: {n}\n")
+
+    # Same shared place strings for both, so only the layout differs
+    measure("dict", make_dict, n)
+    measure("ConversationState", make_state, n)
+
+    # Fresh place strings per session: shows what interning in __setitem__ saves
+    measure("dict, fresh strings", lambda i: make_dict(i, True), n)
+    measure("state, fresh strings", lambda i: make_state(i, True), n)
+
+    snapshots = measure("serialized bytes", make_snapshot, n)
+
+    # Round-trip check
+    assert ConversationState.from_bytes(snapshots[1]) == make_state(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+Always-open microphone capture backed by a preallocated ring buffer.
+
+The input stream is opened once and kept running for the whole session.
+While the assistant is speaking the capture is muted, so incoming blocks
+are discarded instead of being recognized. The audio callback copies each
+block into a fixed NumPy buffer and never allocates; when the reader falls
+behind, new frames are dropped and counted rather than growing a queue.
+"""
+
+import threading
+
+import numpy as np
+import sounddevice as sd
+
+
+class AudioCapture:
+    def __init__(self, samplerate, blocksize, seconds=10):
+        self.samplerate = samplerate
+        self.blocksize = blocksize
+        self.capacity = int(samplerate * seconds)
+
+        self._buffer = np.zeros(self.capacity, dtype=np.int16)
+        # Absolute frame counters; positions in the buffer are taken modulo capacity
+        self._read_pos = 0
+        self._write_pos = 0
+        self._ready = threading.Condition()
+        self._muted = True
+        self._stream = None
+
+        self.overflows = 0        # input overflows reported by PortAudio
+        self.dropped_frames = 0   # frames dropped because the buffer was full
+        self.gated_frames = 0     # frames discarded while muted
+
+    # ---------- stream control ----------
+    def start(self):
+        if self._stream is None:
+            self._stream = sd.RawInputStream(
+                samplerate=self.samplerate,
+                blocksize=self.blocksize,
+                dtype="int16",
+                channels=1,
+                callback=self._callback
+            )
+            self._stream.start()
+
+    def close(self):
+        if self._stream is not None:
+            self._stream.stop()
+            self._stream.close()
+            self._stream = None
+
+    def mute(self):
+        with self._ready:
+            self._muted = True
+
+    def unmute(self):
+        """Start accepting audio again, discarding anything buffered before."""
+        with self._ready:
+            self._read_pos = self._write_pos
+            self._muted = False
+
+    # ---------- producer (PortAudio thread) ----------
+    def _callback(self, indata, frames, time, status):
+        if status.input_overflow:
+            self.overflows += 1
+
+        samples = np.frombuffer(indata, dtype=np.int16)
+
+        with self._ready:
+            if self._muted:
+                self.gated_frames += frames
+                return
+
+            free = self.capacity - (self._write_pos - self._read_pos)
+            if frames > free:
+                # Backpressure: keep unread audio, drop the newest frames
+                self.dropped_frames += frames - free
+                samples = samples[:free]
+
+            n = len(samples)
+            start = self._write_pos % self.capacity
+            first = min(n, self.capacity - start)
+            self._buffer[start:start + first] = samples[:first]
+            self._buffer[:n - first] = samples[first:]
+            self._write_pos += n
+            self._ready.notify()
+
+    # ---------- consumer ----------
+    def available(self):
+        with self._ready:
+            return self._write_pos - self._read_pos
+
+    def read(self, frames=None, timeout=None):
+        """Block until `frames` frames are buffered and return them as bytes.
+
+        Returns None if the timeout expires first.
+        """
+        frames = frames or self.blocksize
+        with self._ready:
+            if not self._ready.wait_for(lambda: self._write_pos - self._read_pos >= frames, timeout):
+                return None
+
+            start = self._read_pos % self.capacity
+            first = min(frames, self.capacity - start)
+            data = self._buffer[start:start + first].tobytes()
+            if first < frames:
+                data += self._buffer[:frames - first].tobytes()
+            self._read_pos += frames
+        return data
+
+    def stats(self):
+        with self._ready:
+            fill = (self._write_pos - self._read_pos) / self.capacity
+        return {
+            "overflows": self.overflows,
+            "dropped_frames": self.dropped_frames,
+            "gated_frames": self.gated_frames,
+            "fill": round(fill, 3),
+        }
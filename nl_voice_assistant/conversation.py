@@ -0,0 +1,145 @@
+"""
+Compact conversation state shared by all entry points.
+
+ConversationState keeps the same keys the old free-form dict used and
+supports the dict-style access that parse_intent/handle_intent rely on
+(state.get(key), state[key], state[key] = value). It adds a compact
+binary encoding so sessions can be snapshotted to disk or handed to
+another worker process.
+"""
+
+import struct
+import sys
+from datetime import date
+
+FIELDS = (
+    "last_place",
+    "last_day",
+    "last_created_event_id",
+    "last_referenced_event_id",
+)
+
+FORMAT_VERSION = 1
+
+# version, last_day as proleptic ordinal (0 = None)
+_HEADER = struct.Struct("<BI")
+
+# Value tags for places and event IDs
+_TAG_NONE = 0
+_TAG_INT = 1
+_TAG_STR = 2
+
+_INT = struct.Struct("<q")
+_LEN = struct.Struct("<H")
+
+
+class ConversationState:
+    __slots__ = FIELDS
+
+    def __init__(self, last_place=None, last_day=None,
+                 last_created_event_id=None, last_referenced_event_id=None):
+        self.last_place = last_place
+        self.last_day = last_day
+        self.last_created_event_id = last_created_event_id
+        self.last_referenced_event_id = last_referenced_event_id
+
+    # ---------- dict-style access ----------
+    def __getitem__(self, key):
+        if key not in FIELDS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __setitem__(self, key, value):
+        if key not in FIELDS:
+            raise KeyError(key)
+        if key == "last_place" and isinstance(value, str):
+            # Many sessions mention the same few cities
+            value = sys.intern(value)
+        setattr(self, key, value)
+
+    def __contains__(self, key):
+        return key in FIELDS
+
+    def get(self, key, default=None):
+        if key not in FIELDS:
+            return default
+        return getattr(self, key)
+
+    def keys(self):
+        return FIELDS
+
+    def items(self):
+        return [(k, getattr(self, k)) for k in FIELDS]
+
+    def __eq__(self, other):
+        if not isinstance(other, ConversationState):
+            return NotImplemented
+        return self.items() == other.items()
+
+    def __repr__(self):
+        fields = ", ".join(f"{k}={v!r}" for k, v in self.items())
+        return f"ConversationState({fields})"
+
+    # ---------- binary encoding ----------
+    def to_bytes(self):
+        day = self.last_day.toordinal() if self.last_day else 0
+        parts = [_HEADER.pack(FORMAT_VERSION, day)]
+        parts.append(_pack_value(self.last_place))
+        parts.append(_pack_value(self.last_created_event_id))
+        parts.append(_pack_value(self.last_referenced_event_id))
+        return b"".join(parts)
+
+    @classmethod
+    def from_bytes(cls, data):
+        version, day = _HEADER.unpack_from(data, 0)
+        if version != FORMAT_VERSION:
+            raise ValueError(f"Unsupported state format version {version}")
+        offset = _HEADER.size
+
+        place, offset = _unpack_value(data, offset)
+        created_id, offset = _unpack_value(data, offset)
+        referenced_id, offset = _unpack_value(data, offset)
+
+        state = cls(
+            last_day=date.fromordinal(day) if day else None,
+            last_created_event_id=created_id,
+            last_referenced_event_id=referenced_id,
+        )
+        state["last_place"] = place
+        return state
+
+    def __reduce__(self):
+        # Pickle (e.g. multiprocessing hand-off) through the compact encoding
+        return (ConversationState.from_bytes, (self.to_bytes(),))
+
+    def save(self, path):
+        with open(path, "wb") as f:
+            f.write(self.to_bytes())
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as f:
+            return cls.from_bytes(f.read())
+
+
+def _pack_value(value):
+    if value is None:
+        return bytes([_TAG_NONE])
+    if isinstance(value, int):
+        return bytes([_TAG_INT]) + _INT.pack(value)
+    raw = str(value).encode("utf-8")
+    return bytes([_TAG_STR]) + _LEN.pack(len(raw)) + raw
+
+
+def _unpack_value(data, offset):
+    tag = data[offset]
+    offset += 1
+    if tag == _TAG_NONE:
+        return None, offset
+    if tag == _TAG_INT:
+        return _INT.unpack_from(data, offset)[0], offset + _INT.size
+    if tag == _TAG_STR:
+        (length,) = _LEN.unpack_from(data, offset)
+        offset += _LEN.size
+        return data[offset:offset + length].decode("utf-8"), offset + length
+    raise ValueError(f"Unknown value tag {tag}")
@@ -1,7 +1,10 @@
 import re
+import threading
+from collections import OrderedDict
 from datetime import date, datetime, timedelta
 
 DEBUG = True  # Set to False to silence debug logs
+PARSE_CACHE_SIZE = 1024  # parse_intent results kept per normalized text
 
 WEEKDAYS = [
     "monday", "tuesday", "wednesday",
@@ -55,22 +58,126 @@ KNOWN_PLACES = [
     "kassel", "giessen", "gießen", "cologne", "stuttgart", "leipzig"
 ]
 
+NUMBER_WORDS = {
+    "two": 2, "three": 3, "four": 4, "five": 5, "six": 6, "seven": 7,
+    "2": 2, "3": 3, "4": 4, "5": 5, "6": 6, "7": 7,
+}
+
 
 def dprint(*args):
     if DEBUG:
         print("[NLU]", *args)
 
 
-def parse_intent(text, state):
-    text = text.lower().strip()
-    dprint("RAW TEXT:", text)
+# ================= MEMOIZED PARSING =================
+# Results are cached per normalized text. Parsing runs against a probe
+# state whose values are _StateRef placeholders, so the cached result
+# records exactly which fields came from state["last_place"] or
+# state["last_day"]; those are filled in from the caller's state on every
+# lookup. Results from a parse that looked at today's date (see _today)
+# are dropped when the day changes, whether or not they contain a date.
+
+class _StateRef:
+    __slots__ = ("key",)
+
+    def __init__(self, key):
+        self.key = key
+
+
+_PROBE_STATE = {key: _StateRef(key) for key in ("last_place", "last_day")}
+
+_cache = OrderedDict()  # normalized text -> (result template, day it depends on or None)
+_cache_lock = threading.Lock()
+_cache_stats = {"hits": 0, "misses": 0, "invalidations": 0, "state_resolutions": 0}
+_parse_local = threading.local()
+
+
+def _today():
+    """date.today(), recording that the current parse depends on it."""
+    _parse_local.used_today = True
+    return date.today()
+
 
 def parse_intent(text, state):
-    text = text.lower().strip()
-    dprint("RAW:", text)
+    key = " ".join(text.lower().split())
+    today = date.today()
 
-    # GREETINGS
-    if any(w in text for w in ["hello", "hi", "hey", "good morning", "good evening"]):
+    with _cache_lock:
+        entry = _cache.get(key)
+        if entry is not None and entry[1] not in (None, today):
+            del _cache[key]
+            _cache_stats["invalidations"] += 1
+            entry = None
+        if entry is not None:
+            _cache.move_to_end(key)
+            _cache_stats["hits"] += 1
+
+    if entry is None:
+        dprint("RAW:", key)
+        _parse_local.used_today = False
+        template = _parse_intent(key, _PROBE_STATE)
+        depends_on_day = today if _parse_local.used_today else None
+        entry = (template, depends_on_day)
+        with _cache_lock:
+            _cache_stats["misses"] += 1
+            _cache[key] = entry
+            if len(_cache) > PARSE_CACHE_SIZE:
+                _cache.popitem(last=False)
+    else:
+        dprint("CACHED:", key)
+
+    template = entry[0]
+    if any(_contains_ref(v) for v in template.values()):
+        with _cache_lock:
+            _cache_stats["state_resolutions"] += 1
+    return {k: _resolve(v, state) for k, v in template.items()}
+
+
+def _contains_ref(value):
+    if isinstance(value, list):
+        return any(_contains_ref(v) for v in value)
+    return isinstance(value, _StateRef)
+
+
+def _resolve(value, state):
+    if isinstance(value, _StateRef):
+        return state.get(value.key)
+    if isinstance(value, list):
+        return [_resolve(v, state) for v in value]
+    return value
+
+
+def peek_intent(text):
+    """Intent name for text, without counting a cache lookup or logging."""
+    key = " ".join(text.lower().split())
+    with _cache_lock:
+        entry = _cache.get(key)
+    if entry is not None and entry[1] in (None, date.today()):
+        return entry[0].get("intent")
+    return _parse_intent(key, _PROBE_STATE).get("intent")
+
+
+def parse_cache_info():
+    """Hit/miss counters and size of the parse_intent cache."""
+    with _cache_lock:
+        info = dict(_cache_stats)
+        info["size"] = len(_cache)
+    lookups = info["hits"] + info["misses"]
+    info["maxsize"] = PARSE_CACHE_SIZE
+    info["hit_rate"] = round(info["hits"] / lookups, 3) if lookups else None
+    return info
+
+
+def parse_cache_clear():
+    with _cache_lock:
+        _cache.clear()
+        for k in _cache_stats:
+            _cache_stats[k] = 0
+
+
+def _parse_intent(text, state):
+    # GREETINGS (whole words, so "this" or "which" do not count as "hi")
+    if re.search(r"\b(hello|hi|hey|good morning|good evening)\b", text):
         return {"intent": "greeting"}
 
     if any(w in text for w in ["how are you", "how are you doing"]):
@@ -78,8 +185,19 @@ def parse_intent(text, state):
 
     # WEATHER
     if any(w in text for w in ["weather", "temperature", "forecast", "whether", "rain"]):
+        places = extract_places(text)
+        days = extract_days(text)
+        if len(places) > 1 or len(days) > 1:
+            return {
+                "intent": "compare_weather",
+                "places": places or [state.get("last_place")],
+                "days": days or [extract_day(text, state)],
+                "rain_only": "rain" in text,
+            }
+
         place = extract_place(text, state)
-        day = extract_day(text, state)
+        # extract_days also covers "weekend", which extract_day does not know
+        day = days[0] if days else extract_day(text, state)
 
         if "rain" in text:
             return {"intent": "check_rain", "place": place, "day": day}
@@ -135,6 +253,16 @@ def extract_place(text, state):
     return state.get("last_place")
 
 
+def extract_places(text):
+    """All known places mentioned in the text, in order of appearance."""
+    found = []
+    for city in KNOWN_PLACES:
+        pos = text.find(city)
+        if pos >= 0:
+            found.append((pos, city))
+    return [city for _, city in sorted(found)]
+
+
 def extract_title(text):
     if "doctor" in text:
         return "doctor"
@@ -162,17 +290,16 @@ def extract_new_location(text):
 
 
 def extract_day(text, state):
-    today = date.today()
     text = text.lower()
 
     if "today" in text:
-        return today
+        return _today()
     if "tomorrow" in text:
-        return today + timedelta(days=1)
+        return _today() + timedelta(days=1)
 
     for i, name in enumerate(WEEKDAYS):
         if name in text:
-            return next_weekday(today, i)
+            return next_weekday(_today(), i)
 
     words = text.split()
 
@@ -181,6 +308,7 @@ def extract_day(text, state):
             day_num = FUZZY_ORDINALS[w]
             for m in words:
                 if m in FUZZY_MONTHS:
+                    today = _today()
                     month_num = FUZZY_MONTHS[m]
                     year = today.year
                     try:
@@ -193,6 +321,7 @@ def extract_day(text, state):
 
     m = re.search(r"(january|february|march|april|may|june|july|august|september|october|november|december) (\d+)", text)
     if m:
+        today = _today()
         month = FUZZY_MONTHS[m.group(1)]
         day_num = int(m.group(2))
         d = date(today.year, month, day_num)
@@ -203,6 +332,38 @@ def extract_day(text, state):
     return state.get("last_day")
 
 
+def extract_days(text):
+    """All days mentioned in the text (weekend, next N days, weekdays,
+    today/tomorrow), sorted and without duplicates."""
+    days = set()
+
+    if "weekend" in text:
+        today = _today()
+        if today.weekday() == 6:
+            # Already Sunday: only what is left of this weekend
+            days.add(today)
+        else:
+            saturday = next_weekday(today, 5)
+            days.update([saturday, saturday + timedelta(days=1)])
+
+    m = re.search(r"next (\w+) days", text)
+    if m and m.group(1) in NUMBER_WORDS:
+        today = _today()
+        for i in range(NUMBER_WORDS[m.group(1)]):
+            days.add(today + timedelta(days=i))
+
+    for i, name in enumerate(WEEKDAYS):
+        if name in text:
+            days.add(next_weekday(_today(), i))
+
+    if "today" in text:
+        days.add(_today())
+    if "tomorrow" in text:
+        days.add(_today() + timedelta(days=1))
+
+    return sorted(days)
+
+
 def next_weekday(start_date, weekday_index):
     days_ahead = weekday_index - start_date.weekday()
     if days_ahead < 0:
@@ -0,0 +1,148 @@
+"""
+Speculative prefetch of weather and calendar data.
+
+While the user is still speaking, partial transcripts are scanned for
+weather or appointment keywords and the matching API call is started in
+the background. The intent handlers then pick up the prefetched result
+instead of paying for a fresh round trip.
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import api_weather
+import api_calendar
+from nlu import extract_place, extract_places
+
+WEATHER_WORDS = ["weather", "temperature", "forecast", "whether", "rain"]
+# Calendar commands that never read the listing (same words as nlu)
+CALENDAR_WRITE_WORDS = ["add", "create", "delete", "remove", "cancel"]
+
+_executor = ThreadPoolExecutor(max_workers=4)
+
+# key -> Future of (result, fetch ms)
+_pending = {}
+# Handlers may look up prefetches from several threads (e.g. compare_weather)
+_lock = threading.Lock()
+
+_turn = {"started": 0, "hits": 0, "misses": 0, "saved_ms": 0.0}
+_totals = {"started": 0, "hits": 0, "misses": 0, "saved_ms": 0.0}
+
+
+# ================= FETCHING =================
+def _timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, (time.perf_counter() - start) * 1000
+
+
+def _start(key, fn, *args):
+    with _lock:
+        if key in _pending:
+            return
+        _pending[key] = _executor.submit(_timed, fn, *args)
+        _turn["started"] += 1
+
+
+def _count(**deltas):
+    with _lock:
+        for k, v in deltas.items():
+            _turn[k] += v
+
+
+def _take(key, fn, *args):
+    """Return the prefetched result for key, or fetch it now."""
+    with _lock:
+        future = _pending.pop(key, None)
+    if future is None:
+        _count(misses=1)
+        return fn(*args)
+
+    wait_start = time.perf_counter()
+    try:
+        result, fetch_ms = future.result()
+    except Exception:
+        # Prefetch failed: retry in the foreground so errors surface normally
+        _count(misses=1)
+        return fn(*args)
+    waited_ms = (time.perf_counter() - wait_start) * 1000
+
+    _count(hits=1, saved_ms=max(0.0, fetch_ms - waited_ms))
+    return result
+
+
+def _wants_listing(text):
+    """True for the intents that read the listing: next appointment and
+    changing an appointment's location."""
+    if any(w in text for w in CALENDAR_WRITE_WORDS):
+        return False
+    if "next appointment" in text:
+        return True
+    return ("change" in text or "update" in text) and ("location" in text or "place" in text)
+
+
+# ================= PUBLIC API =================
+def on_partial(text, state):
+    """Inspect a partial transcript and start any useful fetches."""
+    text = text.lower()
+
+    if any(w in text for w in WEATHER_WORDS):
+        places = extract_places(text) or [extract_place(text, state)]
+        for place in places:
+            if place:
+                _start(("weather", place), api_weather.get_weather, place)
+
+    if _wants_listing(text):
+        _start(("events",), api_calendar.list_events)
+
+
+def get_weather(place):
+    return _take(("weather", place), api_weather.get_weather, place)
+
+
+def list_events():
+    return _take(("events",), api_calendar.list_events)
+
+
+def iter_events(start=None, end=None):
+    """Prefetched listing filtered to [start, end), or a streaming listing.
+
+    A bounded query can stop a streaming listing early, so it only uses a
+    prefetch whose download has already finished.
+    """
+    with _lock:
+        future = _pending.get(("events",))
+    if future is not None and ((start is None and end is None) or future.done()):
+        events = list_events()
+        if not isinstance(events, list):
+            events = []  # null or an error object: same as the streaming listing
+        return api_calendar.filter_events(events, start, end)
+    _count(misses=1)
+    return api_calendar.iter_events(start, end)
+
+
+def begin_turn():
+    """Drop prefetches left over from the previous turn and reset counters."""
+    with _lock:
+        for future in _pending.values():
+            future.cancel()
+        _pending.clear()
+        for k in _turn:
+            _turn[k] = 0
+
+
+def end_turn():
+    """Return this turn's prefetch statistics and add them to the totals."""
+    with _lock:
+        for k in _turn:
+            _totals[k] += _turn[k]
+
+    lookups = _totals["hits"] + _totals["misses"]
+    return {
+        "prefetched": _turn["started"],
+        "hits": _turn["hits"],
+        "misses": _turn["misses"],
+        "saved_ms": round(_turn["saved_ms"], 1),
+        "hit_rate": round(_totals["hits"] / lookups, 3) if lookups else None,
+    }
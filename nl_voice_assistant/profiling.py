@@ -0,0 +1,161 @@
+"""
+Memory and allocation profiling for long-running sessions (--profile).
+
+Per turn it records RSS, tracemalloc usage and live recognizer/TTS object
+counts. Every `snapshot_every` turns it takes a tracemalloc snapshot so the
+report can show which allocation sites grew since the first turn.
+Optionally each pipeline stage runs under its own cProfile profiler.
+"""
+
+import cProfile
+import contextlib
+import gc
+import io
+import pstats
+import time
+import tracemalloc
+
+# Object types counted per turn (matched by class name)
+TRACKED_TYPES = ("Model", "KaldiRecognizer", "Engine")
+TRACEBACK_FRAMES = 5
+
+# Keep the profiler's own bookkeeping out of the allocation report
+SNAPSHOT_FILTERS = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, __file__),
+)
+
+
+def read_rss_kb():
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def count_tracked_objects():
+    counts = dict.fromkeys(TRACKED_TYPES, 0)
+    for obj in gc.get_objects():
+        name = type(obj).__name__
+        if name in counts:
+            counts[name] += 1
+    return counts
+
+
+class SessionProfiler:
+    def __init__(self, path, snapshot_every=10, top=25, cprofile=False):
+        self.path = path
+        self.snapshot_every = snapshot_every
+        self.top = top
+        self.cprofile = cprofile
+
+        self.turns = []
+        self.stage_times = {}
+        self.stage_profiles = {}
+        self._turn_stages = {}
+        self._baseline = None
+        self._latest = None
+
+        tracemalloc.start(TRACEBACK_FRAMES)
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        """Time (and optionally cProfile) one pipeline stage."""
+        profile = None
+        if self.cprofile:
+            profile = self.stage_profiles.setdefault(name, cProfile.Profile())
+            profile.enable()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            if profile:
+                profile.disable()
+            self._turn_stages[name] = self._turn_stages.get(name, 0) + elapsed_ms
+            self.stage_times[name] = self.stage_times.get(name, 0) + elapsed_ms
+
+    def end_turn(self):
+        traced, peak = tracemalloc.get_traced_memory()
+        record = {
+            "turn": len(self.turns) + 1,
+            "rss_kb": read_rss_kb(),
+            "traced_kb": traced // 1024,
+            "peak_kb": peak // 1024,
+            "gc_counts": gc.get_count(),
+            "objects": count_tracked_objects(),
+            "stages_ms": {k: round(v, 1) for k, v in self._turn_stages.items()},
+        }
+        self.turns.append(record)
+        self._turn_stages = {}
+
+        if self._baseline is None:
+            self._baseline = self._snapshot()
+        elif record["turn"] % self.snapshot_every == 0:
+            self._latest = self._snapshot()
+        return record
+
+    def _snapshot(self):
+        return tracemalloc.take_snapshot().filter_traces(SNAPSHOT_FILTERS)
+
+    def dump(self):
+        """Write the report to self.path."""
+        out = io.StringIO()
+
+        out.write("=== Per-turn memory ===\n")
+        out.write(f"{'turn':>6}{'RSS KB':>10}{'traced KB':>11}{'peak KB':>10}  objects / stages (ms)\n")
+        for r in self.turns:
+            objects = " ".join(f"{k}={v}" for k, v in r["objects"].items())
+            stages = " ".join(f"{k}={v}" for k, v in r["stages_ms"].items())
+            out.write(f"{r['turn']:>6}{r['rss_kb']:>10}{r['traced_kb']:>11}{r['peak_kb']:>10}  "
+                      f"{objects} | {stages}\n")
+
+        snapshot = self._latest or self._snapshot()
+        out.write(f"\n=== Top {self.top} allocation sites ===\n")
+        for stat in snapshot.statistics("lineno")[:self.top]:
+            out.write(f"{stat}\n")
+
+        if self._baseline is not None:
+            out.write(f"\n=== Top {self.top} growth since first turn ===\n")
+            for stat in snapshot.compare_to(self._baseline, "lineno")[:self.top]:
+                out.write(f"{stat}\n")
+
+        if self.stage_times:
+            out.write("\n=== Stage totals (ms) ===\n")
+            for name, total in self.stage_times.items():
+                out.write(f"{name:<10}{total:12.1f}\n")
+
+        for name, profile in self.stage_profiles.items():
+            out.write(f"\n=== cProfile: {name} ===\n")
+            pstats.Stats(profile, stream=out).sort_stats("cumulative").print_stats(self.top)
+
+        with open(self.path, "w") as f:
+            f.write(out.getvalue())
+        print(f"Profile saved to: {self.path}")
+
+
+def add_profile_arguments(parser, default_path):
+    parser.add_argument("--profile", nargs="?", const=default_path, metavar="PATH",
+                        help=f"record memory/allocation profile (default: {default_path})")
+    parser.add_argument("--cprofile", action="store_true",
+                        help="with --profile, also run cProfile per stage")
+    parser.add_argument("--snapshot-every", type=int, default=10,
+                        help="turns between tracemalloc snapshots")
+
+
+def profiler_from_args(args):
+    if not args.profile:
+        return None
+    return SessionProfiler(args.profile, snapshot_every=args.snapshot_every, cprofile=args.cprofile)
+
+
+def profile_stage(profiler, name):
+    """profiler.stage(name), or a no-op context when profiling is off."""
+    if profiler is None:
+        return contextlib.nullcontext()
+    return profiler.stage(name)
@@ -0,0 +1,141 @@
+"""
+Faster-than-real-time replay harness for the live assistant loop.
+
+Drives asr_tts.run_conversation from WAV files or synthetic audio instead
+of the microphone, with TTS sent to a null or file sink, and reports turn
+latency percentiles and memory growth.
+
+Usage:
+    python3 replay.py --turns 10000 --no-api --quiet
+    python3 replay.py --source synthetic --speedup 20 --turns 500
+    python3 replay.py --turns 1000 --no-api --trace-memory
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+import nlu
+from profiling import read_rss_kb
+from sources import SyntheticSource, WavFileSource
+
+AUDIO_SAMPLES_DIR = "audio_samples"
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def describe_intent(intent, state):
+    """Offline stand-in for handle_intent: no weather or calendar calls."""
+    return f"Understood {intent.get('intent')}."
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--turns", type=int, default=10000)
+    parser.add_argument("--source", choices=["wav", "synthetic"], default="wav")
+    parser.add_argument("--audio-dir", default=AUDIO_SAMPLES_DIR)
+    parser.add_argument("--speedup", type=float, default=0,
+                        help="playback speed relative to real time (0 = unthrottled)")
+    parser.add_argument("--sink", choices=["null", "file"], default="null")
+    parser.add_argument("--no-api", action="store_true",
+                        help="answer with the intent name and skip prefetch, so no weather/calendar API calls")
+    parser.add_argument("--sample-every", type=int, default=100,
+                        help="turns between memory samples")
+    parser.add_argument("--trace-memory", action="store_true",
+                        help="also sample tracemalloc usage (slows every allocation, so latencies are inflated)")
+    parser.add_argument("--quiet", action="store_true", help="silence per-turn logging")
+    parser.add_argument("--report", help="write the full report as JSON to this path")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+
+    import asr_tts
+
+    if args.source == "wav":
+        paths = sorted(
+            os.path.join(args.audio_dir, f) for f in os.listdir(args.audio_dir) if f.endswith(".wav")
+        )
+        source = WavFileSource(paths, asr_tts.SAMPLE_RATE, asr_tts.BLOCK_SIZE, args.speedup)
+    else:
+        source = SyntheticSource(asr_tts.SAMPLE_RATE, asr_tts.BLOCK_SIZE, args.speedup)
+
+    asr_tts.audio_source = source
+    asr_tts.TTS_SINK = args.sink
+    handler = describe_intent if args.no_api else asr_tts.handle_intent
+
+    turns = []
+    memory = []
+
+    def on_turn(stats):
+        turns.append(stats)
+        if stats["turn"] == 1 or stats["turn"] % args.sample_every == 0:
+            sample = {"turn": stats["turn"], "rss_kb": read_rss_kb()}
+            if args.trace_memory:
+                current, peak = tracemalloc.get_traced_memory()
+                sample["traced_kb"] = current // 1024
+                sample["peak_kb"] = peak // 1024
+            memory.append(sample)
+
+    if args.quiet:
+        nlu.DEBUG = False
+
+    # tracemalloc hooks every allocation, so it stays off unless asked for
+    if args.trace_memory:
+        tracemalloc.start()
+    start = time.perf_counter()
+    with open(os.devnull, "w") as devnull:
+        with contextlib.redirect_stdout(devnull if args.quiet else sys.stdout):
+            asr_tts.run_conversation(max_turns=args.turns, handler=handler, on_turn=on_turn,
+                                     prefetch_enabled=not args.no_api)
+    elapsed = time.perf_counter() - start
+    if args.trace_memory:
+        tracemalloc.stop()
+
+    if not turns:
+        print("No turns completed")
+        return
+
+    audio_seconds = source.frames / asr_tts.SAMPLE_RATE
+    report = {
+        "turns": len(turns),
+        "wall_seconds": round(elapsed, 1),
+        "audio_seconds": round(audio_seconds, 1),
+        "realtime_factor": round(audio_seconds / elapsed, 1) if elapsed else None,
+        "latency_ms": {},
+        "turn_ms": {},
+        "memory": memory,
+    }
+    for key in ("latency_ms", "turn_ms"):
+        values = [t[key] for t in turns]
+        for pct in (50, 90, 99):
+            report[key][f"p{pct}"] = round(percentile(values, pct), 1)
+        report[key]["max"] = round(max(values), 1)
+
+    print(f"Turns:           {report['turns']} in {report['wall_seconds']} s "
+          f"({report['realtime_factor']}x real time)")
+    for key in ("latency_ms", "turn_ms"):
+        print(f"{key + ':':<17}" + "  ".join(f"{k}={v}" for k, v in report[key].items()))
+    first, last = memory[0], memory[-1]
+    if args.trace_memory:
+        print(f"Traced memory:   {first['traced_kb']} KB -> {last['traced_kb']} KB")
+    print(f"RSS:             {first['rss_kb']} KB -> {last['rss_kb']} KB "
+          f"(turn {first['turn']} -> {last['turn']})")
+
+    if args.report:
+        with open(args.report, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Report saved to: {args.report}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Replay audio sources for driving the live loop without a microphone.
+
+Sources follow the same interface as capture.AudioCapture (start, close,
+mute, unmute, read, stats). Each unmute() begins a new utterance; read()
+returns one block of 16-bit mono PCM and None once the utterance is over.
+Playback is paced at `speedup` times real time (None = as fast as possible).
+"""
+
+import itertools
+import random
+import time
+import wave
+from array import array
+
+TRAILING_SILENCE = 1.0  # seconds of silence appended so Vosk can endpoint
+
+
+class _ReplaySource:
+    """Plays the given PCM clips in order, one per utterance, cycling forever."""
+
+    def __init__(self, clips, samplerate, blocksize, speedup=None):
+        if not clips:
+            raise ValueError("No audio clips to replay")
+        self.samplerate = samplerate
+        self.blocksize = blocksize
+        self.speedup = speedup
+        self.utterances = 0
+        self.frames = 0
+        self._cycle = itertools.cycle(clips)
+        self._pcm = b""
+        self._pos = 0
+
+    def start(self):
+        pass
+
+    def close(self):
+        pass
+
+    def mute(self):
+        pass
+
+    def unmute(self):
+        silence = bytes(2 * int(self.samplerate * TRAILING_SILENCE))
+        self._pcm = next(self._cycle) + silence
+        self._pos = 0
+        self.utterances += 1
+
+    def read(self, frames=None, timeout=None):
+        frames = frames or self.blocksize
+        if self._pos >= len(self._pcm):
+            return None
+
+        data = self._pcm[self._pos:self._pos + 2 * frames]
+        self._pos += len(data)
+        self.frames += len(data) // 2
+
+        if self.speedup:
+            time.sleep(len(data) / 2 / self.samplerate / self.speedup)
+        return data
+
+    def stats(self):
+        return {"utterances": self.utterances, "frames": self.frames}
+
+
+class WavFileSource(_ReplaySource):
+    """Replay WAV files in order, one file per utterance, cycling forever."""
+
+    def __init__(self, paths, samplerate, blocksize, speedup=None):
+        clips = [self._load(p, samplerate) for p in paths]
+        super().__init__(clips, samplerate, blocksize, speedup)
+
+    @staticmethod
+    def _load(path, samplerate):
+        with wave.open(path, "rb") as wf:
+            if wf.getnchannels() != 1 or wf.getsampwidth() != 2:
+                raise ValueError(f"{path}: audio must be 16-bit mono")
+            if wf.getframerate() != samplerate:
+                raise ValueError(f"{path}: sample rate must be {samplerate}Hz")
+            return wf.readframes(wf.getnframes())
+
+
+class SyntheticSource(_ReplaySource):
+    """Low-level random noise utterances of a fixed length (pure ASR load)."""
+
+    def __init__(self, samplerate, blocksize, speedup=None, seconds=3.0, variants=4, seed=0):
+        rng = random.Random(seed)
+        n = int(samplerate * seconds)
+        clips = [
+            array("h", (rng.randint(-200, 200) for _ in range(n))).tobytes()
+            for _ in range(variants)
+        ]
+        super().__init__(clips, samplerate, blocksize, speedup)